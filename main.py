@@ -1,38 +1,449 @@
-from src.data_manager import DataManager
-from src.data_analyzer import DataAnalyzer
-from src.data_processor import DataProcessor
-from src.data_visualizer import DataVisualizer
+import argparse
+import os
+import subprocess
+import sys
 
+# Define db file path and CSV data sources
+DB_FILE = "db/data.db"
+EXPORT_DIR = "exports"
+DATA_FILES = {
+    'train_data': 'data/training_data/train.csv',
+    'ideal_data': 'data/ideal_data/ideal.csv',
+    'test_data': 'data/test_data/test.csv',
+}
 
-def main():
+def lazy_import(module_name):
     """
-        Main function to process and visualize data.
+        Import a module on first use.
+
+        Heavy dependencies (pandas, SQLAlchemy, Bokeh) are only pulled in by the subcommands that
+        need them, so short runs do not pay for unused libraries.
+
+        Args:
+            module_name (str): Dotted module path to import.
+
+        Returns:
+            module: The imported module.
     """
-    try:
-        # Define db file path
-        db_file = "db/data.db"
 
-        # Create data manager, processor, and analyzer Object
-        data_manager = DataManager(db_file)
-        data_processor = DataProcessor(db_file)
-        data_analyzer = DataAnalyzer(db_file)
+    # __import__ goes through the import statement machinery, so -X importtime records the module
+    __import__(module_name)
+
+    return sys.modules[module_name]
+
+
+def profile_imports(argv):
+    """
+        Run the command again under python -X importtime and print the import cost per package.
+
+        The self time of every imported module is summed per top-level package, src modules are listed
+        one by one and standard library modules are grouped as stdlib. Output lines that are not import timings are passed through to stderr.
+
+        Args:
+            argv (list): Command line arguments without --profile-imports.
+    """
+
+    result = subprocess.run([sys.executable, '-X', 'importtime', os.path.abspath(__file__), *argv],
+                            stderr=subprocess.PIPE, text=True)
+
+    # Lines look like "import time:   self [us] | cumulative |   imported package"
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            print(line, file=sys.stderr)
+            continue
+        if 'self [us]' in line:
+            continue
+        self_time, _, module_name = line[len('import time:'):].split('|')
+        module_name = module_name.strip()
+        package = module_name if module_name.startswith('src.') else module_name.split('.')[0]
+        if package in sys.stdlib_module_names or package in sys.builtin_module_names:
+            package = 'stdlib'
+        seconds, modules = profile.get(package, (0.0, 0))
+        profile[package] = (seconds + int(self_time) / 1e6, modules + 1)
+
+    print("Import profile (package, seconds, modules loaded):")
+    for package, (seconds, modules) in sorted(profile.items(), key=lambda item: item[1][0], reverse=True):
+        print(f"  {package:<28} {seconds:8.4f}s {modules:6d}")
+    print(f"  {'total':<28} {sum(seconds for seconds, _ in profile.values()):8.4f}s")
+
+
+def read_table(engine, table_name):
+    """
+        Read a db table written by a previous stage.
+
+        Args:
+            engine (sqlalchemy.engine.base.Engine): DB engine for data operations.
+            table_name (str): Table name in db.
+
+        Returns:
+            pd.DataFrame: Table data.
+    """
+
+    pd = lazy_import('pandas')
+    return pd.read_sql_table(table_name, engine)
+
+
+def ingest(db_file):
+    """
+        Load training, ideal, and test data into db tables.
+
+        Args:
+            db_file (str): Path to db file.
+
+        Returns:
+            Tuple (train_data, ideal_data, test_data): Loaded csv data.
+    """
+
+    DataManager = lazy_import('src.data_manager').DataManager
+    data_manager = DataManager(db_file)
+
+    return tuple(data_manager.load_data_into_table(path, table) for table, path in DATA_FILES.items())
+
+
+def fit(db_file, train_data=None, ideal_data=None):
+    """
+        Find the best fit between training and ideal functions.
+
+        Data not passed in is read from the tables created by the ingest stage.
+
+        Args:
+            db_file (str): Path to db file.
+            train_data (pd.DataFrame): Training data.
+            ideal_data (pd.DataFrame): Ideal data.
+
+        Returns:
+            pd.DataFrame: Best fit results.
+    """
+
+    DataProcessor = lazy_import('src.data_processor').DataProcessor
+    data_processor = DataProcessor(db_file)
+
+    if train_data is None:
+        train_data = read_table(data_processor.engine, 'train_data')
+    if ideal_data is None:
+        ideal_data = read_table(data_processor.engine, 'ideal_data')
+
+    return DataProcessor.find_best_fit(train_data, ideal_data, data_processor.engine)
+
+
+def map_test_data(db_file, test_data=None, ideal_data=None, best_fit_results=None):
+    """
+        Analyze test data points and calculate close and remaining data points.
+
+        Data not passed in is read from the tables created by the ingest and fit stages.
+
+        Args:
+            db_file (str): Path to db file.
+            test_data (pd.DataFrame): Test data.
+            ideal_data (pd.DataFrame): Ideal data.
+            best_fit_results (pd.DataFrame): Best fit results.
+
+        Returns:
+            Tuple (close_datapoints, remaining_data_points): Close data points and remaining data points.
+    """
+
+    DataAnalyzer = lazy_import('src.data_analyzer').DataAnalyzer
+    data_analyzer = DataAnalyzer(db_file)
+
+    if test_data is None:
+        test_data = read_table(data_analyzer.engine, 'test_data')
+    if ideal_data is None:
+        ideal_data = read_table(data_analyzer.engine, 'ideal_data')
+    if best_fit_results is None:
+        best_fit_results = read_table(data_analyzer.engine, 'best_fit_results')
+
+    return DataAnalyzer.analyze_data(test_data, ideal_data, best_fit_results, data_analyzer.engine)
+
+
+def plot(db_file):
+    """
+        Visualize best fit functions and mapping from the tables created by the previous stages.
+
+        Args:
+            db_file (str): Path to db file.
+    """
+
+    DatabaseConnector = lazy_import('src.database_connector').DatabaseConnector
+    DataAnalyzer = lazy_import('src.data_analyzer').DataAnalyzer
+    DataVisualizer = lazy_import('src.data_visualizer').DataVisualizer
+    engine = DatabaseConnector(db_file).engine
+
+    train_data = read_table(engine, 'train_data')
+    ideal_data = read_table(engine, 'ideal_data')
+    test_data = read_table(engine, 'test_data')
+    best_fit_results = read_table(engine, 'best_fit_results')
+    close_datapoints_results = read_table(engine, 'close_datapoints_results')
+
+    # Rebuild the close data points dictionary from its db table
+    close_datapoints = {}
+    for ideal_function, group in close_datapoints_results.groupby('Ideal Function', sort=False):
+        close_datapoints[ideal_function] = group[['x', 'y', 'Deviation']].to_numpy()
+    remaining_data_points = DataAnalyzer.find_remaining_data_points(test_data, close_datapoints)
+
+    DataVisualizer.visualize_best_fit(train_data, ideal_data, best_fit_results)
+    DataVisualizer.visualize_mapping(train_data, ideal_data, best_fit_results, close_datapoints, remaining_data_points)
+
+
+def run_all(db_file):
+    """
+        Run every stage in memory: ingest, fit, map, and plot.
+
+        Args:
+            db_file (str): Path to db file.
+    """
+
+    train_data, ideal_data, test_data = ingest(db_file)
+    best_fit_results = fit(db_file, train_data, ideal_data)
+
+    DataVisualizer = lazy_import('src.data_visualizer').DataVisualizer
+
+    # Visualize best fit functions
+    DataVisualizer.visualize_best_fit(train_data, ideal_data, best_fit_results)
+
+    close_datapoints, remaining_data_points = map_test_data(db_file, test_data, ideal_data, best_fit_results)
+
+    # Visualize mapping
+    DataVisualizer.visualize_mapping(train_data, ideal_data, best_fit_results, close_datapoints, remaining_data_points)
+
+
+def ingest_lean(db_file):
+    """
+        Load training, ideal, and test data into db tables using NumPy and sqlite3.
+
+        Args:
+            db_file (str): Path to db file.
+
+        Returns:
+            Tuple (train_data, ideal_data, test_data): Loaded csv data.
+    """
+
+    ArrayPipeline = lazy_import('src.array_pipeline').ArrayPipeline
+    array_pipeline = ArrayPipeline(db_file)
+
+    return tuple(array_pipeline.load_data_into_table(path, table) for table, path in DATA_FILES.items())
+
+
+def fit_lean(db_file, train_data=None, ideal_data=None, cross_validation=None):
+    """
+        Find the best fit between training and ideal functions using NumPy and sqlite3.
+
+        With cross_validation the ideal function selected most often on the folds is written into
+        best_fit_results instead of the full data choice, so the map stage uses it.
+
+        Args:
+            db_file (str): Path to db file.
+            train_data (ArrayTable): Training data.
+            ideal_data (ArrayTable): Ideal data.
+            cross_validation (dict): Keyword arguments for cross_validate_best_fit(), None for the full data fit.
+
+        Returns:
+            Dict: Best fit results.
+    """
+
+    ArrayPipeline = lazy_import('src.array_pipeline').ArrayPipeline
+    array_pipeline = ArrayPipeline(db_file)
+
+    if train_data is None:
+        train_data = array_pipeline.read_table('train_data')
+    if ideal_data is None:
+        ideal_data = array_pipeline.read_table('ideal_data')
+
+    if cross_validation is None:
+        return array_pipeline.find_best_fit(train_data, ideal_data)
+
+    cross_validation_results = array_pipeline.cross_validate_best_fit(train_data, ideal_data, **cross_validation)
+    if cross_validation_results is None:
+        raise ValueError("cross validation failed")
+    print_cross_validation(cross_validation_results)
+
+    return array_pipeline.find_best_fit(train_data, ideal_data, cross_validation_results["Best Ideal Function"])
+
+
+def map_lean(db_file, test_data=None, ideal_data=None, best_fit_results=None):
+    """
+        Analyze test data points using NumPy and sqlite3.
+
+        Args:
+            db_file (str): Path to db file.
+            test_data (ArrayTable): Test data.
+            ideal_data (ArrayTable): Ideal data.
+            best_fit_results (Dict): Best fit results.
+
+        Returns:
+            Tuple (close_datapoints, remaining_data_points): Close data points and remaining data points.
+    """
+
+    ArrayPipeline = lazy_import('src.array_pipeline').ArrayPipeline
+    array_pipeline = ArrayPipeline(db_file)
+
+    if test_data is None:
+        test_data = array_pipeline.read_table('test_data')
+    if ideal_data is None:
+        ideal_data = array_pipeline.read_table('ideal_data')
+    if best_fit_results is None:
+        best_fit_results = array_pipeline.read_best_fit()
+
+    return array_pipeline.analyze_data(test_data, ideal_data, best_fit_results)
+
+
+def run_all_lean(db_file, cross_validation=None):
+    """
+        Run ingest, fit, and map using NumPy and sqlite3, then plot from the db tables.
+
+        Args:
+            db_file (str): Path to db file.
+            cross_validation (dict): Keyword arguments for cross_validate_best_fit(), None for the full data fit.
+    """
+
+    train_data, ideal_data, test_data = ingest_lean(db_file)
+    best_fit_results = fit_lean(db_file, train_data, ideal_data, cross_validation)
+    map_lean(db_file, test_data, ideal_data, best_fit_results)
+    plot(db_file)
+
+
+def export(db_file, export_dir=EXPORT_DIR):
+    """
+        Export train, ideal, best fit, close, and remaining data from the db tables as columnar files.
+
+        Args:
+            db_file (str): Path to db file.
+            export_dir (str): Directory for the exported files.
 
-        # Load training, ideal, and test data into db tables
-        train_data = data_manager.load_data_into_table('data/training_data/train.csv', 'train_data')
-        ideal_data = data_manager.load_data_into_table('data/ideal_data/ideal.csv', 'ideal_data')
-        test_data = data_manager.load_data_into_table('data/test_data/test.csv', 'test_data')
+        Returns:
+            list: Paths of the exported files.
+    """
+
+    ArrayPipeline = lazy_import('src.array_pipeline').ArrayPipeline
+    DataExporter = lazy_import('src.data_exporter').DataExporter
+    array_pipeline = ArrayPipeline(db_file)
+
+    test_data = array_pipeline.read_table('test_data')
+    close_datapoints = array_pipeline.read_close_datapoints()
+    remaining_data_points = array_pipeline.find_remaining_data_points(test_data, close_datapoints)
+
+    return DataExporter.export_results(export_dir, array_pipeline.read_table('train_data'),
+                                       array_pipeline.read_table('ideal_data'), array_pipeline.read_best_fit(),
+                                       close_datapoints, remaining_data_points)
+
+
+def cross_validate(db_file, folds=5, method='kfold', n_jobs=None):
+    """
+        Cross validate the best fit selection on the ingested training and ideal data and print its stability.
+
+        Args:
+            db_file (str): Path to db file.
+            folds (int): Number of k-fold splits or bootstrap resamples.
+            method (str): 'kfold' or 'bootstrap'.
+            n_jobs (int): Number of threads.
+
+        Returns:
+            Dict: Cross validation results.
+    """
+
+    ArrayPipeline = lazy_import('src.array_pipeline').ArrayPipeline
+    array_pipeline = ArrayPipeline(db_file)
+
+    cross_validation = array_pipeline.cross_validate_best_fit(array_pipeline.read_table('train_data'),
+                                                              array_pipeline.read_table('ideal_data'),
+                                                              folds, method, n_jobs)
+
+    if cross_validation is not None:
+        print_cross_validation(cross_validation)
+
+    return cross_validation
+
+
+def print_cross_validation(cross_validation):
+    """
+        Print the cross validation results, one line per training column.
+
+        Args:
+            cross_validation (dict): Cross validation results.
+    """
+
+    for row in zip(*cross_validation.values()):
+        print("{} -> {} (stability {:.0%}, mean least squares {:.4f}, full data {})".format(*row))
+
+
+COMMANDS = {
+    'ingest': ingest,
+    'fit': fit,
+    'map': map_test_data,
+    'plot': plot,
+    'all': run_all,
+    'cv': cross_validate,
+    'export': export,
+}
+
+# Same stages on plain NumPy arrays and sqlite3, without pandas and SQLAlchemy
+LEAN_COMMANDS = {
+    'ingest': ingest_lean,
+    'fit': fit_lean,
+    'map': map_lean,
+    'plot': plot,
+    'all': run_all_lean,
+    'cv': cross_validate,
+    'export': export,
+}
+
+
+def parse_args(argv=None):
+    """
+        Parse command line arguments.
+
+        Args:
+            argv (list): Command line arguments, defaults to sys.argv.
 
-        # Find the best fit between training and ideal functions
-        best_fit_results = DataProcessor.find_best_fit(train_data, ideal_data, data_processor.engine)
+        Returns:
+            argparse.Namespace: Parsed arguments.
+    """
+
+    parser = argparse.ArgumentParser(description="Process, analyze, and visualize training, ideal, and test data.")
+    parser.add_argument('command', nargs='?', default='all', choices=COMMANDS,
+                        help="Stage to run: ingest, fit, map, plot, all (default), cv, or export.")
+    parser.add_argument('--db', default=DB_FILE, help="Path to db file.")
+    parser.add_argument('--engine', default='pandas', choices=['pandas', 'numpy'],
+                        help="Run ingest, fit, and map on pandas/SQLAlchemy (default) or on NumPy/sqlite3.")
+    parser.add_argument('--cv', action='store_true',
+                        help="With --engine numpy, fit and all use the cross validated best fit selection.")
+    parser.add_argument('--folds', type=int, default=5, help="Number of folds or resamples for cv and --cv.")
+    parser.add_argument('--cv-method', default='kfold', choices=['kfold', 'bootstrap'], help="Resampling method for cv.")
+    parser.add_argument('--jobs', type=int, default=None, help="Number of threads for cv, defaults to the number of CPUs.")
+    parser.add_argument('--export-dir', default=EXPORT_DIR, help="Directory for the export files.")
+    parser.add_argument('--profile-imports', action='store_true',
+                        help="Run the command under python -X importtime and print the import cost per package.")
+
+    return parser.parse_args(argv)
 
-        # Visualize best fit functions
-        DataVisualizer.visualize_best_fit(train_data, ideal_data, best_fit_results)
 
-        # Analyze test data points and calculate close and remaining data points
-        close_datapoints, remaining_data_points = DataAnalyzer.analyze_data(test_data, ideal_data, best_fit_results, data_analyzer.engine)
+def main(argv=None):
+    """
+        Main function to process and visualize data.
 
-        # Visualize mapping
-        DataVisualizer.visualize_mapping(train_data, ideal_data, best_fit_results, close_datapoints, remaining_data_points)
+        Args:
+            argv (list): Command line arguments, defaults to sys.argv.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    args = parse_args(argv)
+
+    if args.profile_imports:
+        profile_imports([argument for argument in argv if argument != '--profile-imports'])
+        return
+
+    try:
+        commands = LEAN_COMMANDS if args.engine == 'numpy' else COMMANDS
+        if args.command == 'cv':
+            commands[args.command](args.db, args.folds, args.cv_method, args.jobs)
+        elif args.cv:
+            if args.engine != 'numpy' or args.command not in ('fit', 'all'):
+                raise ValueError("--cv is only supported by fit and all with --engine numpy")
+            cross_validation = {'folds': args.folds, 'method': args.cv_method, 'n_jobs': args.jobs}
+            commands[args.command](args.db, cross_validation=cross_validation)
+        elif args.command == 'export':
+            commands[args.command](args.db, args.export_dir)
+        else:
+            commands[args.command](args.db)
 
         # Indication of Program End
         print("Program Ended")
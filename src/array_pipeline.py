@@ -0,0 +1,576 @@
+import csv
+import itertools
+import math
+import os
+import sqlite3
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from src.exceptions import EmptyCSVError
+
+# Number of CSV rows parsed into one float array at a time
+CSV_CHUNK_ROWS = 1024
+
+
+class ArrayTable:
+    """
+        ArrayTable class for holding a dataset as a contiguous 2D NumPy array.
+
+        Columns are addressed by name through a column-name map, so the array can be used
+        in place of a DataFrame for column lookups without pandas.
+
+        Args:
+            columns (list): Column names.
+            values (np.array): 2D array with one column per name.
+            column_types (list): SQLite column types, defaults to INTEGER for integer arrays and FLOAT otherwise.
+
+        Attributes:
+            columns (list): Column names.
+            column_index (dict): Column name to array column index.
+            column_types (dict): Column name to SQLite column type (INTEGER or FLOAT).
+            values (np.array): C-contiguous float64 2D array.
+    """
+
+    def __init__(self, columns, values, column_types=None):
+        """
+            Initialize an ArrayTable instance.
+
+            Args:
+                columns (list): Column names.
+                values (np.array): 2D array with one column per name.
+                column_types (list): SQLite column types, defaults to INTEGER for integer arrays and FLOAT otherwise.
+        """
+
+        self.columns = list(columns)
+        self.column_index = {name: index for index, name in enumerate(self.columns)}
+
+        # Values are always float64 for computation, the column types keep integer columns INTEGER in db
+        if column_types is None:
+            column_type = 'INTEGER' if np.issubdtype(np.asarray(values).dtype, np.integer) else 'FLOAT'
+            column_types = [column_type] * len(self.columns)
+        self.column_types = dict(zip(self.columns, column_types))
+        self.values = np.ascontiguousarray(values, dtype=np.float64).reshape(-1, len(self.columns))
+
+    def __getitem__(self, column):
+        """
+            Return a column as a 1D array view.
+
+            Args:
+                column (str): Column name.
+
+            Returns:
+                np.array: Column values.
+        """
+
+        return self.values[:, self.column_index[column]]
+
+    def __len__(self):
+        """
+            Return the number of rows.
+        """
+
+        return self.values.shape[0]
+
+    def select(self, columns):
+        """
+            Return the given columns as a 2D array.
+
+            Args:
+                columns (list): Column names.
+
+            Returns:
+                np.array: Array with one column per name.
+        """
+
+        return self.values[:, [self.column_index[column] for column in columns]]
+
+    def is_integer(self, *columns):
+        """
+            Check if all given columns are integer columns.
+
+            Args:
+                columns (str): Column names.
+
+            Returns:
+                bool: True if every column has the INTEGER type.
+        """
+
+        return all(self.column_types[column] == 'INTEGER' for column in columns)
+
+
+class ArrayPipeline:
+    """
+        ArrayPipeline class for running the core pipeline on NumPy arrays and sqlite3.
+
+        This class is a lean alternative to DataManager, DataProcessor and DataAnalyzer. Data is kept
+        in ArrayTable objects and results are written with the stdlib sqlite3 module, so neither pandas
+        nor SQLAlchemy is needed. Results equal those of find_best_fit() and analyze_data().
+
+        Args:
+            db_file (str): Path to db file.
+
+        Attributes:
+            db_file (str): Path to db file.
+
+        Methods:
+            load_data_into_table(data_file_path, table_name): Load CSV data into a db table.
+            read_csv(data_file_path): Read a numeric CSV file into a 2D array.
+            quote_identifier(name): Quote a table or column name for SQLite.
+            read_table(table_name): Read a numeric db table.
+            read_best_fit(): Read the best fit results table.
+            read_close_datapoints(): Read the close data points table.
+            write_table(table_name, columns, column_types, rows): Replace a db table with the given rows.
+            find_best_fit(train_data, ideal_data, selection): Find best fit between training and ideal data.
+            cross_validate_best_fit(train_data, ideal_data, folds, method, n_jobs, seed):
+                Select the best fit on k-fold or bootstrap resamples and report selection stability.
+            analyze_data(test_data, ideal_data, best_fit_results): Analyze the test data.
+            find_close_data_points(test_data, ideal_data, best_fit_results): Find close data points in the test data.
+            find_remaining_data_points(test_data, close_datapoints): Find remaining data points in the test data.
+    """
+
+    def __init__(self, db_file):
+        """
+            Initialize an ArrayPipeline instance.
+
+            Args:
+                db_file (str): Path to db file.
+        """
+
+        self.db_file = db_file
+
+    def load_data_into_table(self, data_file_path, table_name):
+        """
+            Load data from CSV file into db table.
+
+            Args:
+                data_file_path (str): Path to CSV file.
+                table_name (str): Table name to be created in db.
+
+            Returns:
+                ArrayTable: Loaded csv data.
+
+            Raises:
+                EmptyCSVError: Custom Exception if CSV file is empty.
+        """
+
+        try:
+            columns, values, column_types = ArrayPipeline.read_csv(data_file_path)
+            csv_data = ArrayTable(columns, values, column_types)
+
+            # Save the data to the specified table in db, INTEGER affinity stores whole floats as integers
+            self.write_table(table_name, columns, column_types, (row.tolist() for row in csv_data.values))
+
+            return csv_data
+        except EmptyCSVError as e:
+            # Handle Custom Exception for EmptyCSVError
+            print(e)
+        except Exception as e:
+            # Handle other exceptions
+            print(f"An error occurred during load_data_into_table(): {e}")
+
+    @staticmethod
+    def read_csv(data_file_path):
+        """
+            Read a numeric CSV file into a float64 2D array.
+
+            Rows are parsed in chunks, so no string copy of the whole file is kept. Empty fields become NaN.
+            Columns with only whole number literals and no missing values are INTEGER, as with pandas.read_csv.
+
+            Args:
+                data_file_path (str): Path to CSV file.
+
+            Returns:
+                Tuple (columns, values, column_types): Column names, values, and SQLite column types.
+
+            Raises:
+                EmptyCSVError: Custom Exception if CSV file is empty.
+        """
+
+        with open(data_file_path, 'r', newline='') as file:
+            reader = csv.reader(file)
+            columns = next(reader, None)
+
+            # Check if the CSV file is completely empty
+            if not columns or not any(column.strip() for column in columns):
+                raise EmptyCSVError(data_file_path)
+
+            chunks = []
+            integer_columns = set(range(len(columns)))
+            rows = []
+            # A trailing None flushes the last chunk
+            for row in itertools.chain(reader, [None]):
+                # Skip blank lines and fill short rows with missing values
+                if row:
+                    rows.append([field.strip() or 'nan' for field in row] + ['nan'] * (len(columns) - len(row)))
+                if rows and (row is None or len(rows) == CSV_CHUNK_ROWS):
+                    integer_columns = {index for index in integer_columns
+                                       if all(fields[index].lstrip('+-').isdigit() for fields in rows)}
+                    chunks.append(np.array(rows, dtype=np.float64))
+                    rows = []
+
+        # Check if the CSV file has headers but is empty
+        if not chunks:
+            raise EmptyCSVError(data_file_path)
+
+        column_types = ['INTEGER' if index in integer_columns else 'FLOAT' for index in range(len(columns))]
+
+        return columns, np.concatenate(chunks), column_types
+
+    @staticmethod
+    def quote_identifier(name):
+        """
+            Quote a table or column name for SQLite.
+
+            Args:
+                name (str): Table or column name.
+
+            Returns:
+                str: Name in double quotes, with double quotes inside escaped.
+        """
+
+        return '"' + name.replace('"', '""') + '"'
+
+    def read_table(self, table_name):
+        """
+            Read a numeric db table.
+
+            Args:
+                table_name (str): Table name in db.
+
+            Returns:
+                ArrayTable: Table data.
+        """
+
+        try:
+            with closing(sqlite3.connect(self.db_file)) as connection, connection:
+                table = ArrayPipeline.quote_identifier(table_name)
+                table_info = connection.execute(f'PRAGMA table_info({table})').fetchall()
+                values = np.array(connection.execute(f'SELECT * FROM {table}').fetchall(), dtype=np.float64)
+
+            # Keep the declared column types, pandas declares integer columns as INTEGER or BIGINT
+            columns = [column_info[1] for column_info in table_info]
+            column_types = ['INTEGER' if 'INT' in column_info[2].upper() else 'FLOAT' for column_info in table_info]
+
+            return ArrayTable(columns, values, column_types)
+        except Exception as e:
+            # Handle exceptions
+            print(f"An error occurred during read_table(): {e}")
+
+    def read_best_fit(self):
+        """
+            Read the best fit results table.
+
+            Returns:
+                Dict: Best fit results including Training Data Function, Best Ideal Function, and Best Least Square Value.
+        """
+
+        try:
+            with closing(sqlite3.connect(self.db_file)) as connection, connection:
+                rows = connection.execute('SELECT "Training Data Function", "Best Ideal Function", '
+                                          '"Best Least Square Value" FROM best_fit_results').fetchall()
+
+            return {"Training Data Function": [row[0] for row in rows],
+                    "Best Ideal Function": [row[1] for row in rows],
+                    "Best Least Square Value": [row[2] for row in rows]}
+        except Exception as e:
+            # Handle exceptions
+            print(f"An error occurred during read_best_fit(): {e}")
+
+    def read_close_datapoints(self):
+        """
+            Read the close data points table.
+
+            Returns:
+                Dict: Close data points.
+        """
+
+        try:
+            with closing(sqlite3.connect(self.db_file)) as connection, connection:
+                rows = connection.execute('SELECT x, y, Deviation, "Ideal Function" FROM close_datapoints_results').fetchall()
+
+            # Group rows by ideal function, in order of first appearance
+            close_datapoints = {}
+            for x_value, y_value, deviation, ideal_function in rows:
+                close_datapoints.setdefault(ideal_function, []).append([x_value, y_value, deviation])
+            for key, value in close_datapoints.items():
+                close_datapoints[key] = np.array(value, dtype=np.float64)
+
+            return close_datapoints
+        except Exception as e:
+            # Handle exceptions
+            print(f"An error occurred during read_close_datapoints(): {e}")
+
+    def write_table(self, table_name, columns, column_types, rows):
+        """
+            Replace a db table with the given rows.
+
+            Args:
+                table_name (str): Table name to be created in db.
+                columns (list): Column names.
+                column_types (list): SQLite column types.
+                rows (iterable): Row tuples or lists.
+        """
+
+        table = ArrayPipeline.quote_identifier(table_name)
+        column_definitions = ", ".join(f'{ArrayPipeline.quote_identifier(column)} {column_type}'
+                                       for column, column_type in zip(columns, column_types))
+        placeholders = ", ".join("?" * len(columns))
+
+        with closing(sqlite3.connect(self.db_file)) as connection, connection:
+            connection.execute(f'DROP TABLE IF EXISTS {table}')
+            connection.execute(f'CREATE TABLE {table} ({column_definitions})')
+            connection.executemany(f'INSERT INTO {table} VALUES ({placeholders})', rows)
+
+    def find_best_fit(self, train_data, ideal_data, selection=None):
+        """
+            Find the best fit between training data and ideal data.
+
+            The least squares of every training column against every ideal column are computed in
+            one array operation per training column.
+
+            Args:
+                train_data (ArrayTable): Training data.
+                ideal_data (ArrayTable): Ideal data.
+                selection (list): Ideal function per training column to use instead of the lowest least squares,
+                    e.g. the Best Ideal Function of cross_validate_best_fit().
+
+            Returns:
+                Dict: Best fit results including Training Data Function, Best Ideal Function, and Best Least Square Value.
+        """
+
+        try:
+            train_columns = [f'y{i}' for i in range(1, len(train_data.columns))]
+            ideal_columns = [f'y{j}' for j in range(1, len(ideal_data.columns))]
+            ideal_values = ideal_data.select(ideal_columns)
+
+            # Define dictionary to store the best fit results
+            best_fit = {"Training Data Function": [], "Best Ideal Function": [], "Best Least Square Value": []}
+
+            for train_column in train_columns:
+                # Least squares against all ideal columns, argmin keeps the first lowest value
+                least_squares = np.sum((train_data[train_column][:, np.newaxis] - ideal_values) ** 2, axis=0)
+                if selection is None:
+                    best_index = int(np.argmin(least_squares))
+                else:
+                    best_index = ideal_columns.index(selection[len(best_fit["Training Data Function"])])
+
+                # Least squares of two integer columns stay integer
+                if train_data.is_integer(train_column) and ideal_data.is_integer(ideal_columns[best_index]):
+                    best_ls = int(least_squares[best_index])
+                else:
+                    best_ls = float(least_squares[best_index])
+
+                best_fit["Training Data Function"].append(train_column)
+                best_fit["Best Ideal Function"].append(ideal_columns[best_index])
+                best_fit["Best Least Square Value"].append(best_ls)
+
+            # Create db table for best fit results
+            is_integer = all(isinstance(value, int) for value in best_fit["Best Least Square Value"])
+            self.write_table("best_fit_results", list(best_fit), ['TEXT', 'TEXT', 'INTEGER' if is_integer else 'FLOAT'],
+                             list(zip(*best_fit.values())))
+
+            return best_fit
+        except Exception as e:
+            # Handle exceptions
+            print(f"An error occurred during find_best_fit(): {e}")
+
+    def cross_validate_best_fit(self, train_data, ideal_data, folds=5, method='kfold', n_jobs=None, seed=0):
+        """
+            Select the best fit between training data and ideal data on resamples of the training data.
+
+            The squared errors of every training column against every ideal column are computed once.
+            Each fold is a row weight vector (k-fold: 1 outside the held-out part, bootstrap: draw counts),
+            so the least squares of all folds are a single matrix product, split across threads.
+
+            The ideal function selected on most folds is reported. If several are selected equally often,
+            the full data choice wins if it is among them, otherwise the lowest mean least squares.
+
+            Args:
+                train_data (ArrayTable): Training data.
+                ideal_data (ArrayTable): Ideal data.
+                folds (int): Number of k-fold splits or bootstrap resamples.
+                method (str): 'kfold' or 'bootstrap'.
+                n_jobs (int): Number of threads, defaults to the number of CPUs.
+                seed (int): Seed for shuffling and resampling.
+
+            Returns:
+                Dict: Cross validation results including Training Data Function, Best Ideal Function,
+                Selection Stability (share of folds selecting it), Mean Least Square Value, and Full Data Ideal Function.
+        """
+
+        try:
+            train_columns = [f'y{i}' for i in range(1, len(train_data.columns))]
+            ideal_columns = [f'y{j}' for j in range(1, len(ideal_data.columns))]
+            n_rows = len(train_data)
+
+            if n_rows != len(ideal_data):
+                raise ValueError("training and ideal data must have the same number of rows")
+            if folds < 2 or (method == 'kfold' and folds > n_rows):
+                raise ValueError(f"invalid number of folds: {folds}")
+            if n_jobs is not None and n_jobs < 1:
+                raise ValueError(f"invalid number of jobs: {n_jobs}")
+
+            # Row weights of every fold
+            rng = np.random.default_rng(seed)
+            if method == 'kfold':
+                weights = np.ones((folds, n_rows))
+                for fold, held_out in enumerate(np.array_split(rng.permutation(n_rows), folds)):
+                    weights[fold, held_out] = 0
+            elif method == 'bootstrap':
+                weights = np.stack([np.bincount(rng.integers(0, n_rows, n_rows), minlength=n_rows)
+                                    for _ in range(folds)]).astype(np.float64)
+            else:
+                raise ValueError(f"unknown method: {method}")
+
+            # Squared errors of all training and ideal column pairs, shape (rows, train columns * ideal columns)
+            train_values = train_data.select(train_columns)
+            ideal_values = ideal_data.select(ideal_columns)
+            squared_errors = ((train_values[:, :, np.newaxis] - ideal_values[:, np.newaxis, :]) ** 2).reshape(n_rows, -1)
+
+            # Least squares of all folds, fold chunks are computed in parallel
+            n_jobs = min(n_jobs or os.cpu_count() or 1, folds)
+            with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+                chunks = executor.map(lambda chunk: chunk.dot(squared_errors), np.array_split(weights, n_jobs))
+                least_squares = np.vstack(list(chunks)).reshape(folds, len(train_columns), len(ideal_columns))
+
+            # Count how often each ideal function is selected per training column
+            selections = np.argmin(least_squares, axis=2)
+            counts = np.zeros((len(train_columns), len(ideal_columns)), dtype=int)
+            for train_index in range(len(train_columns)):
+                counts[train_index] = np.bincount(selections[:, train_index], minlength=len(ideal_columns))
+            mean_least_squares = least_squares.mean(axis=0)
+            full_indices = np.argmin(squared_errors.sum(axis=0).reshape(len(train_columns), len(ideal_columns)), axis=1)
+
+            # Pick the most selected ideal function, ties go to the full data choice, then the lowest mean least squares
+            best_indices = []
+            for train_index, full_index in enumerate(full_indices):
+                candidates = np.flatnonzero(counts[train_index] == counts[train_index].max())
+                if full_index in candidates:
+                    best_indices.append(full_index)
+                else:
+                    best_indices.append(candidates[np.argmin(mean_least_squares[train_index, candidates])])
+
+            # Define dictionary to store the cross validation results
+            cross_validation = {"Training Data Function": train_columns,
+                                "Best Ideal Function": [ideal_columns[index] for index in best_indices],
+                                "Selection Stability": [float(counts[i, index]) / folds for i, index in enumerate(best_indices)],
+                                "Mean Least Square Value": [float(mean_least_squares[i, index]) for i, index in enumerate(best_indices)],
+                                "Full Data Ideal Function": [ideal_columns[index] for index in full_indices]}
+
+            # Create db table for cross validation results
+            self.write_table("cross_validation_results", list(cross_validation), ['TEXT', 'TEXT', 'FLOAT', 'FLOAT', 'TEXT'],
+                             list(zip(*cross_validation.values())))
+
+            return cross_validation
+        except Exception as e:
+            # Handle exceptions
+            print(f"An error occurred during cross_validate_best_fit(): {e}")
+
+    def analyze_data(self, test_data, ideal_data, best_fit_results):
+        """
+            Analyze the test data and calculate close data points and remaining data points.
+
+            Args:
+                test_data (ArrayTable): Test data.
+                ideal_data (ArrayTable): Ideal data.
+                best_fit_results (Dict): Best fit results.
+
+            Returns:
+                Tuple (close_datapoints, remaining_data_points): Close data points and remaining data points.
+        """
+
+        try:
+            close_datapoints = self.find_close_data_points(test_data, ideal_data, best_fit_results)
+            remaining_data_points = self.find_remaining_data_points(test_data, close_datapoints)
+
+            return close_datapoints, remaining_data_points
+        except Exception as e:
+            # Handle exceptions
+            print(f"An error occurred during analyze_data(): {e}")
+
+    def find_close_data_points(self, test_data, ideal_data, best_fit_results):
+        """
+            Find close data points in the test data.
+
+            Args:
+                test_data (ArrayTable): Test data.
+                ideal_data (ArrayTable): Ideal data.
+                best_fit_results (Dict): Best fit results.
+
+            Returns:
+                Dict: Close data points.
+        """
+
+        try:
+            ideal_functions = list(best_fit_results["Best Ideal Function"])
+            x_test = test_data['x']
+            y_test = test_data['y']
+
+            # Look up the ideal row for every test x value, first match wins
+            x_ideal = ideal_data['x']
+            order = np.argsort(x_ideal, kind='stable')
+            positions = np.clip(np.searchsorted(x_ideal[order], x_test), 0, len(order) - 1)
+            rows = order[positions]
+            found = x_ideal[rows] == x_test
+            for x_value in x_test[~found]:
+                print(f"error: value {x_value} missing")
+
+            # Deviation of every test point to every chosen ideal function
+            deviations = np.abs(y_test[:, np.newaxis] - ideal_data.select(ideal_functions)[rows])
+            deviations[~found] = np.inf
+            deviations[deviations > math.sqrt(2)] = np.inf
+
+            # Pick the closest ideal function, argmin keeps the first one on ties
+            closest = np.argmin(deviations, axis=1)
+            min_deviations = deviations[np.arange(len(x_test)), closest]
+            is_close = np.isfinite(min_deviations)
+
+            # Define dictionary for storing close data points for each ideal function, in order of first match
+            close_datapoints = {}
+            close_rows = np.column_stack((x_test, y_test, min_deviations))
+            for index in np.flatnonzero(is_close):
+                close_datapoints.setdefault(ideal_functions[closest[index]], []).append(index)
+            for key, indices in close_datapoints.items():
+                close_datapoints[key] = close_rows[indices]
+
+            # Store close datapoints into db
+            data_rows = [(x_value, y_value, deviation, ideal_function)
+                         for ideal_function, data_array in close_datapoints.items()
+                         for x_value, y_value, deviation in data_array.tolist()]
+            # Test rows are read as one dtype, integer only if all test columns are integer,
+            # deviations are integer only if the test row and every matched ideal function are integer
+            point_type = 'INTEGER' if test_data.is_integer(*test_data.columns) else 'FLOAT'
+            deviation_type = 'INTEGER' if point_type == 'INTEGER' and ideal_data.is_integer(*close_datapoints) else 'FLOAT'
+            self.write_table("close_datapoints_results", ['x', 'y', 'Deviation', 'Ideal Function'],
+                             [point_type, point_type, deviation_type, 'TEXT'], data_rows)
+
+            return close_datapoints
+        except Exception as e:
+            # Handle exceptions
+            print(f"An error occurred during find_close_data_points(): {e}")
+
+    @staticmethod
+    def find_remaining_data_points(test_data, close_datapoints):
+        """
+            Find remaining data points in the test data.
+
+            Args:
+                test_data (ArrayTable): Test data.
+                close_datapoints (Dict): Close data points.
+
+            Returns:
+                np.array: Remaining data points.
+        """
+
+        try:
+            test_points = test_data.select(['x', 'y'])
+
+            # Collect the (x, y) pairs of all close data points
+            close_points = {(x, y) for data_points in close_datapoints.values() for x, y, _ in data_points.tolist()}
+
+            is_remaining = np.array([(x, y) not in close_points for x, y in test_points.tolist()], dtype=bool)
+
+            return test_points[is_remaining]
+        except Exception as e:
+            # Handle exceptions
+            print(f"An error occurred during find_remaining_data_points(): {e}")
@@ -0,0 +1,160 @@
+import os
+import warnings
+import numpy as np
+
+# pyarrow is optional, results fall back to .npz files without it
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:
+    pa = None
+    ipc = None
+
+
+class DataExporter:
+    """
+        DataExporter class for exporting results as columnar files.
+
+        This class writes training, ideal, best fit, close, and remaining data as one file per table.
+        With pyarrow installed the files are uncompressed Arrow IPC files, which are read back through
+        a memory map without copying. Otherwise they are written as .npz files.
+
+        Methods:
+            export_results(export_dir, train_data, ideal_data, best_fit_results, close_datapoints, remaining_data_points):
+                Export all results into a directory.
+            load_results(export_dir): Load exported results.
+            to_columns(data): Convert a table to a dictionary of column arrays.
+            write_columns(file_path, columns): Write column arrays into a columnar file.
+    """
+
+    @staticmethod
+    def export_results(export_dir, train_data, ideal_data, best_fit_results, close_datapoints, remaining_data_points):
+        """
+            Export all results into a directory.
+
+            Args:
+                export_dir (str): Directory for the exported files.
+                train_data (pd.DataFrame or ArrayTable): Training data.
+                ideal_data (pd.DataFrame or ArrayTable): Ideal data.
+                best_fit_results (pd.DataFrame or Dict): Best fit results.
+                close_datapoints (Dict): Close data points.
+                remaining_data_points (np.array): Remaining data points.
+
+            Returns:
+                list: Paths of the exported files.
+        """
+
+        try:
+            os.makedirs(export_dir, exist_ok=True)
+
+            # Flatten close data points into one row per data point
+            close_arrays = list(close_datapoints.values())
+            close_values = np.vstack(close_arrays) if close_arrays else np.empty((0, 3))
+            close_functions = np.repeat(np.array(list(close_datapoints), dtype=str), [len(value) for value in close_arrays])
+            remaining_values = np.asarray(remaining_data_points, dtype=np.float64).reshape(-1, 2)
+
+            tables = {
+                'train_data': DataExporter.to_columns(train_data),
+                'ideal_data': DataExporter.to_columns(ideal_data),
+                'best_fit_results': DataExporter.to_columns(best_fit_results),
+                'close_datapoints_results': {'x': close_values[:, 0], 'y': close_values[:, 1],
+                                             'Deviation': close_values[:, 2], 'Ideal Function': close_functions},
+                'remaining_data_points': {'x': remaining_values[:, 0], 'y': remaining_values[:, 1]},
+            }
+
+            return [DataExporter.write_columns(os.path.join(export_dir, name), columns) for name, columns in tables.items()]
+        except Exception as e:
+            # Handle exceptions
+            print(f"An error occurred during export_results(): {e}")
+
+    @staticmethod
+    def load_results(export_dir):
+        """
+            Load exported results.
+
+            Arrow IPC files are memory mapped, so numeric columns are returned without copying.
+            Arrow IPC files are skipped with a warning if pyarrow is not installed.
+
+            Args:
+                export_dir (str): Directory with the exported files.
+
+            Returns:
+                Dict: Table name to dictionary of column arrays.
+        """
+
+        try:
+            results = {}
+            for file_name in sorted(os.listdir(export_dir)):
+                name, extension = os.path.splitext(file_name)
+                file_path = os.path.join(export_dir, file_name)
+
+                if extension == '.arrow':
+                    if pa is None:
+                        warnings.warn(f"pyarrow is not installed, skipping '{file_path}'")
+                        continue
+                    table = ipc.open_file(pa.memory_map(file_path, 'r')).read_all()
+                    results[name] = {column: table.column(column).to_numpy() for column in table.column_names}
+                elif extension == '.npz':
+                    with np.load(file_path) as npz_file:
+                        results[name] = {column: npz_file[column] for column in npz_file.files}
+
+            return results
+        except Exception as e:
+            # Handle exceptions
+            print(f"An error occurred during load_results(): {e}")
+
+    @staticmethod
+    def to_columns(data):
+        """
+            Convert a table to a dictionary of column arrays.
+
+            Args:
+                data (pd.DataFrame, ArrayTable or Dict): Table data, INTEGER columns of an ArrayTable become int64.
+
+            Returns:
+                Dict: Column name to array.
+        """
+
+        columns = data.columns if hasattr(data, 'columns') else list(data)
+
+        # Object columns (e.g. pandas strings) become fixed width strings, .npz files cannot load them without pickle
+        arrays = {str(column): np.asarray(data[column]) for column in columns}
+
+        # ArrayTable keeps values as float64, INTEGER columns are exported as int64 like in the db tables
+        column_types = getattr(data, 'column_types', {})
+        arrays = {name: values.astype(np.int64) if column_types.get(name) == 'INTEGER' else values
+                  for name, values in arrays.items()}
+
+        return {name: values.astype(str) if values.dtype == object else values for name, values in arrays.items()}
+
+    @staticmethod
+    def write_columns(file_path, columns):
+        """
+            Write column arrays into a columnar file.
+
+            A file of the other format left by an earlier export is removed.
+
+            Args:
+                file_path (str): File path without extension.
+                columns (Dict): Column name to array.
+
+            Returns:
+                str: Path of the written file.
+        """
+
+        if pa is None:
+            # Fallback without pyarrow
+            stale_path = f"{file_path}.arrow"
+            file_path = f"{file_path}.npz"
+            np.savez(file_path, **columns)
+        else:
+            stale_path = f"{file_path}.npz"
+            file_path = f"{file_path}.arrow"
+            table = pa.table({name: pa.array(values) for name, values in columns.items()})
+            with pa.OSFile(file_path, 'wb') as sink, ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+        if os.path.exists(stale_path):
+            os.remove(stale_path)
+
+        return file_path
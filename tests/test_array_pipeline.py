@@ -0,0 +1,213 @@
+import os
+import tempfile
+import time
+import tracemalloc
+import unittest
+import pandas as pd
+import numpy as np
+import numpy.testing as npt
+from sqlalchemy import create_engine
+from src.array_pipeline import ArrayPipeline, ArrayTable
+from src.data_analyzer import DataAnalyzer
+from src.data_manager import DataManager
+from src.data_processor import DataProcessor
+
+
+class TestArrayPipeline(unittest.TestCase):
+    def setUp(self):
+        # Create temp db file for testing
+        self.db_file = '../db/test.db'
+        self.engine = create_engine(f"sqlite:///{self.db_file}")
+
+        # Create SQLite db file if it doesn't exist
+        if not os.path.exists(self.db_file):
+            open(self.db_file, 'w').close()
+
+        self.array_pipeline = ArrayPipeline(self.db_file)
+
+        # Create temp directory for CSV files and the db of the pandas engine
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.pandas_db_file = os.path.join(self.temp_dir.name, 'pandas.db')
+        self.pandas_engine = create_engine(f"sqlite:///{self.pandas_db_file}")
+
+    def tearDown(self):
+        # Close db engines
+        self.engine.dispose()
+        self.pandas_engine.dispose()
+        time.sleep(2)
+
+        # Delete temp directory
+        self.temp_dir.cleanup()
+
+        # Delete temp test.db
+        if os.path.exists(self.db_file):
+            os.remove(self.db_file)
+
+    @staticmethod
+    def to_array_table(data):
+        return ArrayTable(data.columns, data.to_numpy())
+
+    def write_csv(self, file_name, csv_data):
+        csv_path = os.path.join(self.temp_dir.name, file_name)
+        with open(csv_path, 'w') as csv_file:
+            csv_file.write(csv_data)
+        return csv_path
+
+    def assert_tables_equal(self, table_name):
+        pd.testing.assert_frame_equal(pd.read_sql_table(table_name, self.engine),
+                                      pd.read_sql_table(table_name, self.pandas_engine))
+
+    def test_load_data_into_table(self):
+        data_manager = DataManager(self.pandas_db_file)
+        csv_files = {
+            'integers': "x,y\n1,4\n-2,+5\n3,6\n",
+            'mixed': "x,y\n1,4.5\n2,5\n3,1e2\n",
+            'missing': "x,y\n1,\n2,3\n",
+            'quoted': '"x","y"\n1,2\n',
+            'quote_in_name': '"a""b",y\n1,2\n',
+        }
+
+        for table_name, csv_data in csv_files.items():
+            csv_path = self.write_csv(f'{table_name}.csv', csv_data)
+            expected_result = data_manager.load_data_into_table(csv_path, table_name)
+            loaded_data = self.array_pipeline.load_data_into_table(csv_path, table_name)
+
+            self.assertEqual(loaded_data.columns, list(expected_result.columns))
+            npt.assert_array_equal(loaded_data.values, expected_result.to_numpy(dtype=np.float64))
+            self.assert_tables_equal(table_name)
+
+            read_data = self.array_pipeline.read_table(table_name)
+            self.assertEqual(read_data.column_types, loaded_data.column_types)
+            npt.assert_array_equal(read_data.values, loaded_data.values)
+
+    def test_read_csv_memory(self):
+        # Peak memory stays close to the float data instead of a string copy of the whole file
+        rng = np.random.default_rng(0)
+        values = rng.normal(size=(20000, 20))
+        csv_data = ",".join(f"y{i}" for i in range(20)) + "\n" + "\n".join(",".join(map(repr, row)) for row in values.tolist())
+        csv_path = self.write_csv('large.csv', csv_data)
+        del csv_data
+
+        tracemalloc.start()
+        _, loaded_values, _ = ArrayPipeline.read_csv(csv_path)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        npt.assert_array_equal(loaded_values, values)
+        self.assertLess(peak, 4 * values.nbytes)
+
+    def test_pipeline_matches_pandas_engine(self):
+        data_manager = DataManager(self.pandas_db_file)
+        csv_paths = {
+            'train_data': self.write_csv('train.csv', "x,y1,y2\n1,4,3.5\n2,5,7\n3,6,9\n4,7,12.5\n"),
+            'ideal_data': self.write_csv('ideal.csv', "x,y1,y2,y3\n1,4,3,0\n2,5,7,1\n3,6,9,2\n4,7,12,3\n"),
+            'test_data': self.write_csv('test.csv', "x,y\n1,4\n2,8\n3,6\n4,20\n"),
+        }
+
+        # Pandas engine
+        train_data, ideal_data, test_data = (data_manager.load_data_into_table(path, table) for table, path in csv_paths.items())
+        best_fit_results = DataProcessor.find_best_fit(train_data, ideal_data, self.pandas_engine)
+        DataAnalyzer.analyze_data(test_data, ideal_data, best_fit_results, self.pandas_engine)
+
+        # NumPy engine, reading every stage input back from its db
+        for table, path in csv_paths.items():
+            self.array_pipeline.load_data_into_table(path, table)
+        self.array_pipeline.find_best_fit(self.array_pipeline.read_table('train_data'), self.array_pipeline.read_table('ideal_data'))
+        best_fit = self.array_pipeline.read_best_fit()
+        self.array_pipeline.analyze_data(self.array_pipeline.read_table('test_data'), self.array_pipeline.read_table('ideal_data'),
+                                         best_fit)
+
+        self.assertEqual(best_fit, best_fit_results.to_dict('list'))
+        for table_name in ['train_data', 'ideal_data', 'test_data', 'best_fit_results', 'close_datapoints_results']:
+            self.assert_tables_equal(table_name)
+
+        close_datapoints = self.array_pipeline.read_close_datapoints()
+        self.assertEqual(list(close_datapoints), ['y1', 'y2'])
+        npt.assert_array_equal(close_datapoints['y2'], [[2, 8, 1]])
+
+    def test_find_best_fit(self):
+        train_data = pd.DataFrame({'x': [-5, 0, 5], 'y1': [1, 2, 3], 'y2': [4, 5, 6]})
+        ideal_data = pd.DataFrame({'x': [-5, 0, 5], 'y1': [4.3, 5, 6], 'y2': [8, 9, 10], 'y3': [1.2, 2, 3]})
+
+        best_fit = self.array_pipeline.find_best_fit(self.to_array_table(train_data), self.to_array_table(ideal_data))
+        expected_result = DataProcessor.find_best_fit(train_data, ideal_data, self.engine)
+
+        pd.testing.assert_frame_equal(pd.DataFrame(best_fit), expected_result)
+        pd.testing.assert_frame_equal(pd.read_sql_table("best_fit_results", self.engine), expected_result)
+
+    def test_analyze_data(self):
+        test_data = pd.DataFrame({'x': [1, 2, 3, 4], 'y': [4, 8, 6, 20]})
+        ideal_data = pd.DataFrame({'x': [1, 2, 3, 4], 'y1': [4, 5, 6, 7], 'y2': [3, 7, 9, 12]})
+        best_fit_results = pd.DataFrame(
+            {'Training Data Function': ['y1', 'y2'], 'Best Ideal Function': ['y1', 'y2'], 'Best Least Square Value': [0, 0]})
+
+        close_datapoints, remaining_data_points = self.array_pipeline.analyze_data(
+            self.to_array_table(test_data), self.to_array_table(ideal_data), best_fit_results.to_dict('list'))
+        close_table = pd.read_sql_table("close_datapoints_results", self.engine)
+        expected_close, expected_remaining = DataAnalyzer.analyze_data(test_data, ideal_data, best_fit_results, self.engine)
+
+        self.assertEqual(list(close_datapoints), list(expected_close))
+        for key, value in close_datapoints.items():
+            npt.assert_array_almost_equal(value, expected_close[key])
+        np.testing.assert_array_equal(remaining_data_points, expected_remaining)
+        pd.testing.assert_frame_equal(close_table, pd.read_sql_table("close_datapoints_results", self.engine))
+
+    def test_cross_validate_best_fit(self):
+        x_values = np.linspace(-5, 5, 20)
+        train_data = pd.DataFrame({'x': x_values, 'y1': x_values + 0.1, 'y2': x_values ** 2})
+        ideal_data = pd.DataFrame({'x': x_values, 'y1': x_values ** 2, 'y2': x_values, 'y3': -x_values})
+
+        for method in ['kfold', 'bootstrap']:
+            cross_validation = self.array_pipeline.cross_validate_best_fit(
+                self.to_array_table(train_data), self.to_array_table(ideal_data), folds=4, method=method, n_jobs=2)
+            expected_result = DataProcessor.find_best_fit(train_data, ideal_data, self.engine)
+
+            self.assertEqual(cross_validation["Best Ideal Function"], expected_result["Best Ideal Function"].to_list())
+            self.assertEqual(cross_validation["Full Data Ideal Function"], expected_result["Best Ideal Function"].to_list())
+            self.assertEqual(cross_validation["Selection Stability"], [1.0, 1.0])
+
+    def test_cross_validate_best_fit_unstable(self):
+        # Ideal y1 is off by 2 on all rows but the first, ideal y2 is only off on the first row,
+        # y2 fits best on the full data but y1 on every fold holding out another part
+        x_values = np.arange(20)
+        y_ideal1 = np.where(x_values == 0, 5, 2)
+        y_ideal2 = np.where(x_values == 0, 10, 0)
+        train_data = ArrayTable(['x', 'y1'], np.column_stack((x_values, np.zeros(20))))
+        ideal_data = ArrayTable(['x', 'y1', 'y2'], np.column_stack((x_values, y_ideal1, y_ideal2)))
+
+        cross_validation = self.array_pipeline.cross_validate_best_fit(train_data, ideal_data, folds=5)
+        self.assertEqual(cross_validation["Full Data Ideal Function"], ['y2'])
+        self.assertEqual(cross_validation["Best Ideal Function"], ['y1'])
+        self.assertEqual(cross_validation["Selection Stability"], [0.8])
+
+        # The cross validated choice replaces the full data choice in best_fit_results
+        best_fit = self.array_pipeline.find_best_fit(train_data, ideal_data, cross_validation["Best Ideal Function"])
+        self.assertEqual(best_fit, {"Training Data Function": ['y1'], "Best Ideal Function": ['y1'],
+                                    "Best Least Square Value": [101.0]})
+        self.assertEqual(self.array_pipeline.read_best_fit(), best_fit)
+
+        # With two folds each ideal function is selected once and the full data choice wins the tie
+        cross_validation = self.array_pipeline.cross_validate_best_fit(train_data, ideal_data, folds=2)
+        self.assertEqual(cross_validation["Best Ideal Function"], ['y2'])
+        self.assertEqual(cross_validation["Selection Stability"], [0.5])
+
+    def test_cross_validate_best_fit_bootstrap_seed(self):
+        rng = np.random.default_rng(1)
+        x_values = np.linspace(-5, 5, 30)
+        train_data = ArrayTable(['x', 'y1'], np.column_stack((x_values, x_values + rng.normal(0, 2, 30))))
+        ideal_data = ArrayTable(['x', 'y1', 'y2'], np.column_stack((x_values, x_values + 0.5, x_values - 0.5)))
+
+        first = self.array_pipeline.cross_validate_best_fit(train_data, ideal_data, folds=20, method='bootstrap', seed=7)
+        second = self.array_pipeline.cross_validate_best_fit(train_data, ideal_data, folds=20, method='bootstrap',
+                                                             n_jobs=3, seed=7)
+        self.assertEqual(first, second)
+
+    def test_cross_validate_best_fit_invalid_arguments(self):
+        x_values = np.arange(4)
+        train_data = ArrayTable(['x', 'y1'], np.column_stack((x_values, x_values)))
+        ideal_data = ArrayTable(['x', 'y1'], np.column_stack((x_values, x_values)))
+
+        self.assertIsNone(self.array_pipeline.cross_validate_best_fit(train_data, ideal_data, folds=1))
+        self.assertIsNone(self.array_pipeline.cross_validate_best_fit(train_data, ideal_data, folds=5))
+        self.assertIsNone(self.array_pipeline.cross_validate_best_fit(train_data, ideal_data, folds=2, n_jobs=0))
+        self.assertIsNone(self.array_pipeline.cross_validate_best_fit(train_data, ideal_data, folds=2, n_jobs=-1))
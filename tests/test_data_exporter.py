@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+import numpy as np
+import numpy.testing as npt
+import src.data_exporter
+from src.array_pipeline import ArrayTable
+from src.data_exporter import DataExporter
+
+
+class TestDataExporter(unittest.TestCase):
+    def setUp(self):
+        # Create temp export directory for testing
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.export_dir = os.path.join(self.temp_dir.name, 'exports')
+
+    def tearDown(self):
+        # Delete temp export directory
+        self.temp_dir.cleanup()
+
+    def export_and_load_results(self):
+        train_data = pd.DataFrame({'x': [1, 2, 3], 'y1': [4.0, 5.0, 6.0]})
+        ideal_data = pd.DataFrame({'x': [1, 2, 3], 'y1': [4.0, 5.0, 6.0], 'y2': [3.0, 6.0, 9.0]})
+        best_fit_results = pd.DataFrame(
+            {'Training Data Function': ['y1'], 'Best Ideal Function': ['y1'], 'Best Least Square Value': [0.0]})
+        close_datapoints = {'y1': np.array([[1, 4, 0], [2, 5, 0]])}
+        remaining_data_points = np.array([[3, 20]])
+
+        paths = DataExporter.export_results(self.export_dir, train_data, ideal_data, best_fit_results,
+                                            close_datapoints, remaining_data_points)
+        results = DataExporter.load_results(self.export_dir)
+
+        self.assertEqual(len(paths), 5)
+        self.assertEqual(sorted(results), ['best_fit_results', 'close_datapoints_results', 'ideal_data',
+                                           'remaining_data_points', 'train_data'])
+        npt.assert_array_equal(results['ideal_data']['y2'], ideal_data['y2'])
+        self.assertEqual(list(results['best_fit_results']['Best Ideal Function']), ['y1'])
+        npt.assert_array_equal(results['close_datapoints_results']['y'], [4, 5])
+        self.assertEqual(list(results['close_datapoints_results']['Ideal Function']), ['y1', 'y1'])
+        npt.assert_array_equal(results['remaining_data_points']['y'], [20])
+
+        return paths, results
+
+    def test_export_and_load_results_npz(self):
+        with mock.patch.object(src.data_exporter, 'pa', None):
+            paths, results = self.export_and_load_results()
+
+        self.assertTrue(all(path.endswith('.npz') for path in paths))
+
+    @unittest.skipUnless(src.data_exporter.pa is not None, "pyarrow is not installed")
+    def test_export_and_load_results_arrow(self):
+        paths, results = self.export_and_load_results()
+
+        self.assertTrue(all(path.endswith('.arrow') for path in paths))
+
+        # Numeric columns are read only views on the memory map
+        values = results['ideal_data']['y2']
+        self.assertFalse(values.flags.writeable)
+        self.assertFalse(values.flags.owndata)
+
+    @unittest.skipUnless(src.data_exporter.pa is not None, "pyarrow is not installed")
+    def test_export_replaces_other_format(self):
+        with mock.patch.object(src.data_exporter, 'pa', None):
+            self.export_and_load_results()
+        self.export_and_load_results()
+
+        self.assertTrue(all(file_name.endswith('.arrow') for file_name in os.listdir(self.export_dir)))
+
+        # Arrow files cannot be read without pyarrow
+        with mock.patch.object(src.data_exporter, 'pa', None), self.assertWarns(UserWarning):
+            self.assertEqual(DataExporter.load_results(self.export_dir), {})
+
+    def test_export_integer_columns(self):
+        train_data = ArrayTable(['x', 'y1'], np.array([[1, 4.5], [2, 5.5]]), ['INTEGER', 'FLOAT'])
+        close_datapoints = {'y1': np.array([[1, 4.5, 0.5]])}
+
+        backends = [None, src.data_exporter.pa] if src.data_exporter.pa is not None else [None]
+        for backend in backends:
+            with mock.patch.object(src.data_exporter, 'pa', backend):
+                DataExporter.export_results(self.export_dir, train_data, train_data, {'y': [1]}, close_datapoints,
+                                            np.empty((0, 2)))
+                results = DataExporter.load_results(self.export_dir)
+
+            self.assertEqual(results['train_data']['x'].dtype, np.int64)
+            npt.assert_array_equal(results['train_data']['x'], [1, 2])
+            self.assertEqual(results['train_data']['y1'].dtype, np.float64)
@@ -0,0 +1,57 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+
+# Repository root, main.py resolves the CSV data paths from there
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestMain(unittest.TestCase):
+    def setUp(self):
+        # Create temp db file for testing
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_file = os.path.join(self.temp_dir.name, 'test.db')
+
+    def tearDown(self):
+        # Delete temp db file
+        self.temp_dir.cleanup()
+
+    def run_python(self, *args):
+        return subprocess.run([sys.executable, *args], cwd=ROOT_DIR, capture_output=True, text=True, check=True).stdout
+
+    def test_numpy_fit_does_not_import_heavy_modules(self):
+        script = ("import sys, main; "
+                  f"main.main(['ingest', '--engine', 'numpy', '--db', {self.db_file!r}]); "
+                  f"main.main(['fit', '--engine', 'numpy', '--db', {self.db_file!r}]); "
+                  "print(sorted(name for name in ('pandas', 'sqlalchemy', 'bokeh') if name in sys.modules))")
+        output = self.run_python('-c', script)
+
+        self.assertNotIn("error", output)
+        self.assertEqual(output.splitlines()[-1], "[]")
+
+    def test_profile_imports(self):
+        self.run_python('main.py', 'ingest', '--engine', 'numpy', '--db', self.db_file)
+        output = self.run_python('main.py', 'fit', '--engine', 'numpy', '--db', self.db_file, '--profile-imports')
+
+        packages = [line.split()[0] for line in output.splitlines() if line.startswith('  ')]
+        self.assertIn('numpy', packages)
+        self.assertIn('src.array_pipeline', packages)
+        self.assertNotIn('pandas', packages)
+
+    def test_fit_cross_validated(self):
+        self.run_python('main.py', 'ingest', '--engine', 'numpy', '--db', self.db_file)
+        output = self.run_python('main.py', 'fit', '--engine', 'numpy', '--cv', '--folds', '4', '--db', self.db_file)
+
+        self.assertIn("stability", output)
+        with sqlite3.connect(self.db_file) as connection:
+            best_fit = connection.execute('SELECT "Best Ideal Function" FROM best_fit_results').fetchall()
+            cross_validation = connection.execute('SELECT "Best Ideal Function" FROM cross_validation_results').fetchall()
+        connection.close()
+        self.assertEqual(best_fit, cross_validation)
+
+        # The pandas engine has no cross validation mode
+        output = self.run_python('main.py', 'fit', '--cv', '--db', self.db_file)
+        self.assertIn("--cv is only supported", output)